@@ -4,27 +4,79 @@ import json
 import re
 import subprocess
 import shutil
+import threading
+import heapq
+import tempfile
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import PySimpleGUI as sg
 import time
 
+# watchdog为可选依赖，可用时使用系统文件事件（Linux inotify、Windows ReadDirectoryChangesW），否则轮询文件夹
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
 class AudioProcessor:
-    def __init__(self):
+    # 常见音频文件扩展名
+    AUDIO_EXTENSIONS = ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.ts']
+    # 追加合并时只需写入新数据、不必重写已合并部分的格式
+    APPENDABLE_MERGE_FORMATS = ['.ts', '.aac', '.mp3', '.wav']
+    # MP3（Layer III）帧头的比特率表（kbps，按MPEG1 / MPEG2及2.5区分）和采样率表（按版本位区分）
+    MP3_BITRATES = {
+        1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+    }
+    MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+    # 分段并行编码：每段最短时长（秒），短于两段的文件不拆分
+    MIN_CHUNK_SECONDS = 300
+    # 分段并行编码：分段边界对齐的采样数（wav每包4096采样的整数倍），保证拼接的入点/出点正好落在数据包边界上
+    CHUNK_GRID_SAMPLES = 36864
+    # 分段并行编码：每段前后多解码的重叠长度（对齐单位数），拼接时裁掉
+    CHUNK_OVERLAP_UNITS = 1
+    # 支持流复制无缝拼接的输出格式。只有PCM没有编码器延迟、帧间依赖和估算的定位，
+    # 按采样精确裁剪后拼接与一次性转换的结果逐采样相同；有损格式（mp3、aac/m4a等）的接缝无法保证无缝
+    CHUNKABLE_FORMATS = ['wav']
+    # 编码器名称与ffprobe报告的编码名称不同的情况，其余编码器两者相同
+    ENCODER_CODEC_NAMES = {'libmp3lame': 'mp3', 'libfdk_aac': 'aac', 'libvorbis': 'vorbis'}
+    # 编码速度校准使用的测试音频时长（秒）
+    CALIBRATION_SECONDS = 60
+    # 复制速度校准使用的测试文件时长（秒），44.1kHz立体声WAV约50MB
+    CALIBRATION_COPY_SECONDS = 300
+    # ffprobe探测结果缓存的最大条目数，超出时淘汰最久未使用的条目
+    PROBE_CACHE_SIZE = 5000
+    
+    def __init__(self, headless=False):
         # 配置文件路径 - 标准化确保跨平台兼容性
         self.config_file = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
         
         # 加载配置
         self.load_config()
         
-        # 创建GUI界面
-        self.create_layout()
+        # ffprobe探测结果缓存: (路径, 大小, 修改时间) -> 探测数据
+        self.probe_cache = OrderedDict()
+        self.probe_cache_lock = threading.Lock()
+        self.ffmpeg_version = ''
+        
+        # 创建GUI界面（无界面模式下日志输出到控制台）
+        self.window = None
+        if not headless:
+            self.create_layout()
         
         # 检查ffmpeg
-        self.check_ffmpeg()
+        self.ffmpeg_available = self.check_ffmpeg()
         
         # 转换格式窗口
         self.convert_window = None
         
+        # 拆分音频窗口
+        self.split_window = None
+        
     def load_config(self):
         """加载用户配置"""
         try:
@@ -42,8 +94,29 @@ class AudioProcessor:
                         'channels': '2',
                         'sample_rate': '44100',
                         'start_time': '',
-                        'end_time': ''
+                        'end_time': '',
+                        'parallel': False,
+                        'workers': ''
+                    })
+                    # 加载拆分配置参数
+                    self.split_config = config.get('split_config', {
+                        'mode': 'duration',
+                        'segment_time': '01:00:00',
+                        'cut_points': '',
+                        'silence_noise': '-35dB',
+                        'silence_duration': '2'
                     })
+                    # 加载监控配置参数
+                    self.watch_config = config.get('watch_config', {
+                        'folders': [],
+                        'action': 'convert',
+                        'poll_interval': 5,
+                        'stable_seconds': 10,
+                        'merge_interval': 600,
+                        'status_port': 8765
+                    })
+                    # 加载本机编码速度校准结果
+                    self.calibration_cache = config.get('calibration_cache', {})
             else:
                 self.last_folder = ''
                 self.check_missing_files = False
@@ -55,8 +128,28 @@ class AudioProcessor:
                     'channels': '2',
                     'sample_rate': '44100',
                     'start_time': '',
-                    'end_time': ''
+                    'end_time': '',
+                    'parallel': False,
+                    'workers': ''
+                }
+                # 默认拆分配置
+                self.split_config = {
+                    'mode': 'duration',
+                    'segment_time': '01:00:00',
+                    'cut_points': '',
+                    'silence_noise': '-35dB',
+                    'silence_duration': '2'
+                }
+                # 默认监控配置
+                self.watch_config = {
+                    'folders': [],
+                    'action': 'convert',
+                    'poll_interval': 5,
+                    'stable_seconds': 10,
+                    'merge_interval': 600,
+                    'status_port': 8765
                 }
+                self.calibration_cache = {}
         except:
             self.last_folder = ''
             self.check_missing_files = False
@@ -67,21 +160,45 @@ class AudioProcessor:
                 'channels': '2',
                 'sample_rate': '44100',
                 'start_time': '',
-                'end_time': ''
+                'end_time': '',
+                'parallel': False,
+                'workers': ''
+            }
+            self.split_config = {
+                'mode': 'duration',
+                'segment_time': '01:00:00',
+                'cut_points': '',
+                'silence_noise': '-35dB',
+                'silence_duration': '2'
+            }
+            self.watch_config = {
+                'folders': [],
+                'action': 'convert',
+                'poll_interval': 5,
+                'stable_seconds': 10,
+                'merge_interval': 600,
+                'status_port': 8765
             }
+            self.calibration_cache = {}
     
     def save_config(self):
         """保存用户配置"""
         config = {
             'last_folder': self.last_folder,
             'check_missing_files': self.check_missing_files,
-            'convert_config': self.convert_config
+            'convert_config': self.convert_config,
+            'split_config': self.split_config,
+            'watch_config': self.watch_config,
+            'calibration_cache': self.calibration_cache
         }
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=4)
         except Exception as e:
-            sg.popup_error(f"保存配置失败: {str(e)}")
+            if self.window:
+                sg.popup_error(f"保存配置失败: {str(e)}")
+            else:
+                self.log(f"保存配置失败: {str(e)}")
     
     def create_layout(self):
         """创建GUI布局"""
@@ -104,6 +221,8 @@ class AudioProcessor:
             [sg.HorizontalSeparator()],
             [sg.Button('扫描文件', key='-SCAN-'), 
              sg.Button('合并音频', key='-MERGE-'), 
+             sg.Button('预估合并', key='-PLAN_MERGE-'), 
+             sg.Button('拆分音频', key='-SPLIT-'), 
              sg.Button('转换格式', key='-CONVERT-')],
             [sg.HorizontalSeparator()],
             [sg.Text('日志:', size=(15, 1))],
@@ -122,44 +241,110 @@ class AudioProcessor:
             if result.returncode == 0:
                 # 提取ffmpeg版本信息
                 version_line = result.stdout.split('\n')[0]
-                self.window['-FFMPEG_STATUS-'].update(f'FFmpeg 状态: 已安装 。')
+                self.ffmpeg_version = version_line
+                if self.window:
+                    self.window['-FFMPEG_STATUS-'].update(f'FFmpeg 状态: 已安装 。')
                 self.log(f"FFmpeg已安装: {version_line}")
                 return True
-            else:
-                self.window['-FFMPEG_STATUS-'].update('FFmpeg 状态: 未安装')
-                self.log("错误: 未找到FFmpeg。请先安装FFmpeg并添加到系统环境变量中。")
-                sg.popup_error('未找到FFmpeg。请先安装FFmpeg并添加到系统环境变量中。')
-                return False
         except FileNotFoundError:
+            pass
+        
+        if self.window:
             self.window['-FFMPEG_STATUS-'].update('FFmpeg 状态: 未安装')
-            self.log("错误: 未找到FFmpeg。请先安装FFmpeg并添加到系统环境变量中。")
+        self.log("错误: 未找到FFmpeg。请先安装FFmpeg并添加到系统环境变量中。")
+        if self.window:
             sg.popup_error('未找到FFmpeg。请先安装FFmpeg并添加到系统环境变量中。')
-            return False
+        return False
     
     def log(self, message):
-        """向日志区域添加消息"""
+        """向日志区域添加消息，无界面模式下输出到控制台"""
         timestamp = datetime.now().strftime('%H:%M:%S')
-        self.window['-LOG-'].print(f'[{timestamp}] {message}')
+        if self.window:
+            self.window['-LOG-'].print(f'[{timestamp}] {message}')
+        else:
+            print(f'[{timestamp}] {message}', flush=True)
+        
+    def run_ffprobe(self, file_path):
+        """执行ffprobe并返回 (探测数据, 错误输出)，失败时探测数据为None（可在工作线程中调用，不写日志）"""
+        # 标准化文件路径并转换为FFmpeg兼容格式
+        ffmpeg_file_path = file_path.replace('\\', '/')
+        
+        # 使用ffprobe获取详细信息
+        cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', 
+              '-show_format', '-show_streams', ffmpeg_file_path]
+        result = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, 
+                               stderr=subprocess.PIPE, text=True)
         
+        if result.returncode != 0:
+            return None, result.stderr
+        
+        # 解析JSON输出
+        return json.loads(result.stdout), ''
+    
+    def probe_cache_key(self, file_path):
+        """生成探测缓存键，文件大小或修改时间变化后缓存自动失效"""
+        stat = os.stat(file_path)
+        return (os.path.normpath(file_path), stat.st_size, stat.st_mtime)
+    
+    def get_cached_probe(self, key):
+        """从探测缓存中取出数据并标记为最近使用，没有缓存时返回None"""
+        with self.probe_cache_lock:
+            info = self.probe_cache.get(key)
+            if info is not None:
+                self.probe_cache.move_to_end(key)
+            return info
+    
+    def cache_probe(self, key, info):
+        """保存探测数据，超出PROBE_CACHE_SIZE时淘汰最久未使用的条目"""
+        with self.probe_cache_lock:
+            self.probe_cache[key] = info
+            self.probe_cache.move_to_end(key)
+            while len(self.probe_cache) > self.PROBE_CACHE_SIZE:
+                self.probe_cache.popitem(last=False)
+    
+    def probe_audio_file(self, file_path):
+        """使用ffprobe获取音频文件的原始探测数据（JSON），结果按文件大小和修改时间缓存"""
+        key = self.probe_cache_key(file_path)
+        info = self.get_cached_probe(key)
+        if info is None:
+            info, error = self.run_ffprobe(file_path)
+            if info is None:
+                self.log(f"获取音频信息失败: {error}")
+                return None
+            self.cache_probe(key, info)
+        return info
+    
+    def probe_audio_files(self, folder_path, audio_files, workers):
+        """并行探测多个音频文件，返回 文件名 -> 探测数据（失败为None）"""
+        infos = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for file in audio_files:
+                file_path = os.path.normpath(os.path.join(folder_path, file))
+                key = self.probe_cache_key(file_path)
+                cached = self.get_cached_probe(key)
+                if cached is not None:
+                    infos[file] = cached
+                else:
+                    futures[executor.submit(self.run_ffprobe, file_path)] = (file, key)
+            
+            for future in as_completed(futures):
+                file, key = futures[future]
+                info, error = future.result()
+                if info is None:
+                    self.log(f"获取音频信息失败 {file}: {error}")
+                else:
+                    self.cache_probe(key, info)
+                infos[file] = info
+        return infos
+    
     def get_audio_info(self, file_path):
         """使用ffprobe获取音频文件信息"""
         try:
-            # 标准化文件路径并转换为FFmpeg兼容格式
-            ffmpeg_file_path = file_path.replace('\\', '/')
-            
-            # 使用ffprobe获取详细信息
-            cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', 
-                  '-show_format', '-show_streams', ffmpeg_file_path]
-            result = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, 
-                                   stderr=subprocess.PIPE, text=True)
-            
-            if result.returncode != 0:
-                self.log(f"获取音频信息失败: {result.stderr}")
+            info = self.probe_audio_file(file_path)
+            if not info:
                 return None
             
-            # 解析JSON输出
-            info = json.loads(result.stdout)
-            
             # 提取音频流信息
             audio_stream = None
             for stream in info.get('streams', []):
@@ -214,6 +399,7 @@ class AudioProcessor:
         bitrates = ['96k', '128k', '192k', '256k', '320k']
         channels = ['1', '2', '4', '6']
         sample_rates = ['22050', '44100', '48000', '96000']
+        worker_counts = [str(i) for i in range(1, (os.cpu_count() or 1) + 1)]
         
         # 布局设计
         layout = [
@@ -252,9 +438,16 @@ class AudioProcessor:
             [sg.Text('结束时间:', size=(15, 1)),
              sg.InputText(self.convert_config['end_time'], key='-END_TIME-',
                          size=(15, 1), tooltip='格式: HH:MM:SS')],
+            [sg.Checkbox('并行处理（长文件分段并行编码）',
+                         default=self.convert_config.get('parallel', False), key='-PARALLEL-')],
+            [sg.Text('并行进程数:', size=(15, 1)),
+             sg.Combo(worker_counts, default_value=self.convert_config.get('workers', '') or worker_counts[-1],
+                     key='-WORKERS-', size=(10, 1))],
+            [sg.Text('注: 编码器、比特率、声道数、采样率与设置完全一致且不裁剪时间的文件不重新编码，直接复制或只转换封装')],
             [sg.HorizontalSeparator()],
             [sg.Button('转换选中文件', key='-CONVERT_SELECTED-'),
              sg.Button('转换所有文件', key='-CONVERT_ALL-'),
+             sg.Button('预估计划', key='-PLAN-'),
              sg.Button('保存配置', key='-SAVE_CONFIG-'),
              sg.Button('关闭', key='-CLOSE-')]
         ]
@@ -322,7 +515,9 @@ class AudioProcessor:
                     'channels': values['-CHANNELS-'],
                     'sample_rate': values['-SAMPLE_RATE-'],
                     'start_time': values['-START_TIME-'],
-                    'end_time': values['-END_TIME-']
+                    'end_time': values['-END_TIME-'],
+                    'parallel': values['-PARALLEL-'],
+                    'workers': values['-WORKERS-']
                 }
                 # 保存配置
                 self.save_config()
@@ -349,11 +544,103 @@ class AudioProcessor:
                     continue
                 
                 self.perform_conversion(current_folder, audio_files, values)
+            
+            # 预估转换计划（有选中文件时只预估选中文件）
+            if event == '-PLAN-':
+                if not audio_files:
+                    sg.popup_error('没有找到音频文件！')
+                    continue
+                
+                try:
+                    plan = self.plan_conversion(current_folder, values['-FILE_LIST-'] or audio_files, values)
+                    plan_text = self.format_plan(plan)
+                    self.log(f"{plan['title']}: {len(plan['jobs'])} 个文件，预计总耗时 {self.format_duration(plan['wall_seconds'])}")
+                    sg.popup_scrolled(plan_text, title='转换计划', size=(100, 30))
+                except Exception as e:
+                    self.log(f"生成转换计划失败: {str(e)}")
+                    sg.popup_error(f"生成转换计划失败: {str(e)}")
         
         # 关闭窗口
         self.convert_window.close()
         self.convert_window = None
     
+    def split_audio_window(self):
+        """创建单独的拆分音频页面"""
+        sg.theme('LightBlue2')
+        
+        audio_file_types = (('音频文件', '*.mp3 *.wav *.flac *.aac *.ogg *.wma *.m4a *.ts'), ('所有文件', '*.*'))
+        mode = self.split_config.get('mode', 'duration')
+        
+        # 布局设计
+        layout = [
+            [sg.Text('音频拆分', font=('Arial', 16, 'bold'))],
+            [sg.HorizontalSeparator()],
+            [sg.Text('选择音频文件:', size=(15, 1)),
+             sg.InputText('', key='-SPLIT_FILE-', size=(40, 1)),
+             sg.FileBrowse('浏览', key='-BROWSE-', initial_folder=self.last_folder, file_types=audio_file_types)],
+            [sg.HorizontalSeparator()],
+            [sg.Text('拆分方式:', font=('Arial', 12, 'bold'))],
+            [sg.Radio('按固定时长', 'SPLIT_MODE', default=mode == 'duration', key='-MODE_DURATION-'),
+             sg.Radio('按切割点', 'SPLIT_MODE', default=mode == 'points', key='-MODE_POINTS-'),
+             sg.Radio('按静音检测', 'SPLIT_MODE', default=mode == 'silence', key='-MODE_SILENCE-')],
+            [sg.Text('每段时长:', size=(15, 1)),
+             sg.InputText(self.split_config.get('segment_time', ''), key='-SEGMENT_TIME-',
+                         size=(15, 1), tooltip='格式: HH:MM:SS 或秒数')],
+            [sg.Text('切割点:', size=(15, 1)),
+             sg.InputText(self.split_config.get('cut_points', ''), key='-CUT_POINTS-',
+                         size=(40, 1), tooltip='多个时间用逗号分隔，例如: 01:00:00,02:30:00')],
+            [sg.Text('静音阈值:', size=(15, 1)),
+             sg.InputText(self.split_config.get('silence_noise', '-35dB'), key='-SILENCE_NOISE-',
+                         size=(15, 1), tooltip='低于该音量视为静音，例如: -35dB')],
+            [sg.Text('最短静音时长:', size=(15, 1)),
+             sg.InputText(self.split_config.get('silence_duration', '2'), key='-SILENCE_DURATION-',
+                         size=(15, 1), tooltip='单位: 秒')],
+            [sg.HorizontalSeparator()],
+            [sg.Button('开始拆分', key='-SPLIT-'),
+             sg.Button('关闭', key='-CLOSE-')]
+        ]
+        
+        # 创建窗口
+        self.split_window = sg.Window('音频拆分', layout, resizable=True, finalize=True)
+        
+        # 窗口事件循环
+        while True:
+            event, values = self.split_window.read()
+            
+            if event == sg.WIN_CLOSED or event == '-CLOSE-':
+                break
+            
+            if event == '-SPLIT-':
+                input_file = values['-SPLIT_FILE-']
+                if not input_file or not os.path.isfile(input_file):
+                    sg.popup_error('请先选择要拆分的音频文件！')
+                    continue
+                
+                # 确定拆分方式和参数
+                if values['-MODE_POINTS-']:
+                    mode, split_value = 'points', values['-CUT_POINTS-']
+                elif values['-MODE_SILENCE-']:
+                    mode, split_value = 'silence', values['-SILENCE_DURATION-']
+                else:
+                    mode, split_value = 'duration', values['-SEGMENT_TIME-']
+                
+                # 更新并保存拆分配置
+                self.split_config = {
+                    'mode': mode,
+                    'segment_time': values['-SEGMENT_TIME-'],
+                    'cut_points': values['-CUT_POINTS-'],
+                    'silence_noise': values['-SILENCE_NOISE-'],
+                    'silence_duration': values['-SILENCE_DURATION-']
+                }
+                self.save_config()
+                
+                self.split_audio_file(os.path.normpath(input_file), mode, split_value,
+                                      values['-SILENCE_NOISE-'])
+        
+        # 关闭窗口
+        self.split_window.close()
+        self.split_window = None
+    
     def scan_folder(self, folder_path):
         """扫描文件夹中的音频文件"""
         # 标准化文件夹路径
@@ -366,9 +653,6 @@ class AudioProcessor:
         # 保存最后选择的文件夹
         self.last_folder = folder_path
         
-        # 常见音频文件扩展名
-        audio_extensions = ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.ts']
-        
         audio_files = []
         
         # 遍历文件夹
@@ -376,10 +660,13 @@ class AudioProcessor:
             file_path = os.path.join(folder_path, file)
             if os.path.isfile(file_path):
                 ext = os.path.splitext(file)[1].lower()
-                if ext in audio_extensions:
+                if ext in self.AUDIO_EXTENSIONS:
                     audio_files.append(file)
         
-        # 按文件名排序（尝试按数字排序）
+        return self.sort_audio_files(audio_files)
+    
+    def sort_audio_files(self, audio_files):
+        """按文件名排序（尝试按数字排序）"""
         try:
             audio_files.sort(key=lambda x: int(re.search(r'\d+', x).group()) if re.search(r'\d+', x) else x)
         except:
@@ -437,16 +724,16 @@ class AudioProcessor:
                     # 使用保存的模式信息
                     for file, original_num in file_patterns:
                         # 替换原始数字为缺失的数字
-                        missing_file_name = file.replace(original_num, str(num))
+                        missing_file_name = file.replace(original_num, str(num).zfill(len(original_num)))
                         f.write(f"{missing_file_name}\n")
                         break
             self.log(f"已生成缺失文件清单: {missing_file_path}")
         
         return missing_numbers
     
-    def create_ffmpeg_file_list(self, folder_path, audio_files):
+    def create_ffmpeg_file_list(self, folder_path, audio_files, list_name='files.txt'):
         """创建ffmpeg合并文件列表"""
-        file_list_path = os.path.join(folder_path, 'files.txt')
+        file_list_path = os.path.join(folder_path, list_name)
         
         # 确保路径在FFmpeg中兼容（使用正斜杠）
         try:
@@ -572,6 +859,267 @@ class AudioProcessor:
             sg.popup_error(f"合并音频文件失败: {str(e)}")
             return False
     
+    def copy_file_range(self, source_file, out, start, end):
+        """将源文件 [start, end) 范围内的字节写入已打开的输出文件"""
+        with open(source_file, 'rb') as src:
+            src.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                buffer = src.read(min(1024 * 1024, remaining))
+                if not buffer:
+                    break
+                out.write(buffer)
+                remaining -= len(buffer)
+    
+    def mp3_frame_range(self, file_path):
+        """返回MP3文件中音频帧数据的起止位置，去掉ID3v2、ID3v1标签和Xing/Info/VBRI头帧"""
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            # 开头的ID3v2标签（可能带有10字节的尾部标记）
+            start = 0
+            header = f.read(10)
+            if len(header) == 10 and header[:3] == b'ID3':
+                tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+                start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+            
+            # 末尾128字节的ID3v1标签
+            end = size
+            if size - start >= 128:
+                f.seek(size - 128)
+                if f.read(3) == b'TAG':
+                    end = size - 128
+            
+            # 第一帧是Xing/Info/VBRI头帧时跳过，其中的帧数和索引只对应单个文件
+            f.seek(start)
+            frame = f.read(4)
+            if len(frame) == 4 and frame[0] == 0xFF and (frame[1] & 0xE0) == 0xE0 and (frame[1] >> 1) & 3 == 1:
+                version = (frame[1] >> 3) & 3
+                bitrate_index = frame[2] >> 4
+                sample_rate_index = (frame[2] >> 2) & 3
+                if version != 1 and 0 < bitrate_index < 15 and sample_rate_index < 3:
+                    bitrate = self.MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+                    sample_rate = self.MP3_SAMPLE_RATES[version][sample_rate_index]
+                    frame_length = (144 if version == 3 else 72) * bitrate // sample_rate + ((frame[2] >> 1) & 1)
+                    f.seek(start)
+                    frame_head = f.read(64)
+                    if b'Xing' in frame_head or b'Info' in frame_head or b'VBRI' in frame_head:
+                        start += frame_length
+        return start, end
+    
+    def wav_data_layout(self, file_path):
+        """返回WAV文件的 (fmt块内容, data块数据起始位置, data块长度)"""
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            riff = f.read(12)
+            if riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+                raise Exception(f"不是有效的WAV文件: {file_path}")
+            fmt = None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    raise Exception(f"WAV文件缺少data块: {file_path}")
+                chunk_id, chunk_size = chunk[:4], int.from_bytes(chunk[4:], 'little')
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                    f.seek(chunk_size & 1, 1)
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        raise Exception(f"WAV文件缺少fmt块: {file_path}")
+                    data_offset = f.tell()
+                    # data长度可能未写入或不准确，以实际文件大小为上限
+                    return fmt, data_offset, min(chunk_size, size - data_offset)
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), 1)
+    
+    def append_wav_files(self, folder_path, new_files, output_file):
+        """将WAV文件的PCM数据追加到合并文件末尾，并更新RIFF和data块长度"""
+        for file in new_files:
+            input_file = os.path.join(folder_path, file)
+            fmt, data_offset, data_size = self.wav_data_layout(input_file)
+            
+            # 首次合并时写入只有文件头、数据为空的合并文件
+            if not os.path.exists(output_file):
+                fmt_chunk = b'fmt ' + len(fmt).to_bytes(4, 'little') + fmt + b'\0' * (len(fmt) & 1)
+                with open(output_file, 'wb') as out:
+                    out.write(b'RIFF' + (4 + len(fmt_chunk) + 8).to_bytes(4, 'little') + b'WAVE')
+                    out.write(fmt_chunk + b'data' + (0).to_bytes(4, 'little'))
+            
+            merged_fmt, merged_offset, merged_size = self.wav_data_layout(output_file)
+            if fmt != merged_fmt:
+                raise Exception(f"WAV格式参数与合并文件不一致: {file}")
+            if merged_offset + merged_size != os.path.getsize(output_file):
+                raise Exception(f"合并文件的data块不在文件末尾，无法追加: {output_file}")
+            new_size = merged_size + data_size
+            if merged_offset + new_size > 0xFFFFFFFF:
+                raise Exception(f"合并文件超过WAV格式4GB的限制: {output_file}")
+            
+            with open(output_file, 'r+b') as out:
+                out.seek(0, 2)
+                self.copy_file_range(input_file, out, data_offset, data_offset + data_size)
+                out.seek(4)
+                out.write((merged_offset + new_size - 8).to_bytes(4, 'little'))
+                out.seek(merged_offset - 4)
+                out.write(new_size.to_bytes(4, 'little'))
+            self.log(f"已追加到合并文件: {file}")
+    
+    def append_to_merged_file(self, folder_path, new_files, output_file):
+        """将新的音频文件无损追加到已合并的文件末尾（不弹出对话框，供监控模式使用）"""
+        # 标准化文件路径
+        folder_path = os.path.normpath(folder_path)
+        output_file = os.path.normpath(output_file)
+        ext = os.path.splitext(output_file)[1].lower()
+        
+        if ext in self.APPENDABLE_MERGE_FORMATS:
+            # 追加失败时恢复合并文件追加前的长度和文件头，避免留下不完整的数据
+            original_size = os.path.getsize(output_file) if os.path.exists(output_file) else None
+            if original_size is not None:
+                with open(output_file, 'rb') as f:
+                    original_head = f.read(4096)
+            try:
+                if ext == '.wav':
+                    self.append_wav_files(folder_path, new_files, output_file)
+                    return True
+                with open(output_file, 'ab') as out:
+                    for file in new_files:
+                        input_file = os.path.join(folder_path, file)
+                        if ext == '.mp3':
+                            # 只追加音频帧，去掉每个文件的标签和Xing头帧，避免它们出现在合并文件中间
+                            start, end = self.mp3_frame_range(input_file)
+                        else:
+                            # 可按字节直接拼接的流格式（MPEG-TS、ADTS），直接追加文件内容
+                            start, end = 0, os.path.getsize(input_file)
+                        self.copy_file_range(input_file, out, start, end)
+                        self.log(f"已追加到合并文件: {file}")
+                return True
+            except Exception:
+                if original_size is None:
+                    if os.path.exists(output_file):
+                        os.remove(output_file)
+                else:
+                    with open(output_file, 'r+b') as out:
+                        out.truncate(original_size)
+                        out.seek(0)
+                        out.write(original_head)
+                raise
+        
+        # 其他容器格式需要通过concat协议重写合并文件（临时文件以merged_开头，不会被当作新文件）
+        temp_output = os.path.join(os.path.dirname(output_file), f"merged_appending{ext}")
+        merge_inputs = ([output_file] if os.path.exists(output_file) else []) + list(new_files)
+        file_list_path = self.create_ffmpeg_file_list(folder_path, merge_inputs, 'merged_watch_files.txt')
+        try:
+            cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', file_list_path.replace('\\', '/'),
+                   '-c', 'copy', '-y', temp_output.replace('\\', '/')]
+            self.log(f"执行FFmpeg追加合并命令: {' '.join(cmd)}")
+            result = self.run_ffmpeg(cmd)
+            if result.returncode != 0:
+                self.log(f"FFmpeg追加合并失败输出: {result.stderr}")
+                return False
+            os.replace(temp_output, output_file)
+            return True
+        finally:
+            os.remove(file_list_path)
+            if os.path.exists(temp_output):
+                os.remove(temp_output)
+    
+    def detect_silence_cut_points(self, input_file, silence_noise, silence_duration):
+        """使用ffmpeg的silencedetect滤镜检测静音段，返回每段静音中点的时间（秒）"""
+        cmd = ['ffmpeg', '-i', input_file.replace('\\', '/'), '-map', '0:a:0',
+               '-af', f"silencedetect=noise={silence_noise}:d={silence_duration}", '-f', 'null', '-']
+        self.log(f"执行FFmpeg静音检测命令: {' '.join(cmd)}")
+        result = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        
+        if result.returncode != 0:
+            self.log(f"FFmpeg静音检测失败输出: {result.stderr}")
+            raise Exception(f"FFmpeg静音检测失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
+        
+        # 解析 silence_start / silence_end 输出，在每段静音的中点切割
+        cut_points = []
+        silence_start = None
+        for line in result.stderr.splitlines():
+            start_match = re.search(r'silence_start: (-?[\d.]+)', line)
+            end_match = re.search(r'silence_end: (-?[\d.]+)', line)
+            if start_match:
+                silence_start = max(0.0, float(start_match.group(1)))
+            elif end_match and silence_start is not None:
+                cut_points.append((silence_start + float(end_match.group(1))) / 2)
+                silence_start = None
+        
+        # 去掉文件开头的静音，不在0秒处切割
+        return [t for t in cut_points if t > 0]
+    
+    def split_audio_file(self, input_file, mode, split_value, silence_noise='-35dB'):
+        """使用ffmpeg的segment封装器无损拆分音频文件（合并的逆操作）
+        
+        mode 为 'duration' 时按固定时长拆分，split_value 为每段时长；
+        mode 为 'points' 时按切割点拆分，split_value 为逗号分隔的时间列表；
+        mode 为 'silence' 时在检测到的静音处拆分，split_value 为最短静音时长（秒）。
+        拆分结果保存在原文件夹下的 split_<文件名> 子文件夹中，命名为 part_0001 起的连续序号。
+        """
+        # 标准化输入文件路径
+        input_file = os.path.normpath(input_file)
+        if not os.path.isfile(input_file):
+            sg.popup_error('音频文件不存在！')
+            return []
+        
+        folder_path = os.path.dirname(input_file)
+        base_name, ext = os.path.splitext(os.path.basename(input_file))
+        output_folder = os.path.normpath(os.path.join(folder_path, f"split_{base_name}"))
+        
+        try:
+            # 构建segment封装器参数
+            if mode == 'duration':
+                segment_time = self.parse_time_value(split_value)
+                if not segment_time or segment_time <= 0:
+                    raise Exception(f"无效的分段时长: {split_value}")
+                segment_args = ['-segment_time', f"{segment_time:.3f}"]
+                self.log(f"按固定时长拆分: 每段 {segment_time:.0f} 秒")
+            else:
+                if mode == 'points':
+                    cut_points = [self.parse_time_value(t) for t in split_value.split(',') if t.strip()]
+                else:
+                    cut_points = self.detect_silence_cut_points(input_file, silence_noise, split_value)
+                    self.log(f"检测到 {len(cut_points)} 处静音切割点")
+                cut_points = sorted(set(t for t in cut_points if t and t > 0))
+                if not cut_points:
+                    raise Exception("没有可用的切割点")
+                segment_args = ['-segment_times', ','.join(f"{t:.3f}" for t in cut_points)]
+                self.log(f"按切割点拆分: {len(cut_points)} 个切割点")
+            
+            # 清理上次拆分留下的分段文件，避免与本次结果混在一起
+            if os.path.isdir(output_folder):
+                old_parts = [f for f in os.listdir(output_folder) if f.startswith('part_') and f.endswith(ext)]
+                if old_parts:
+                    if sg.popup_yes_no(f'输出文件夹已存在 {len(old_parts)} 个分段文件，是否覆盖？') != 'Yes':
+                        return []
+                    for file in old_parts:
+                        os.remove(os.path.join(output_folder, file))
+            os.makedirs(output_folder, exist_ok=True)
+            
+            # 执行ffmpeg命令前，确保所有路径使用正斜杠格式
+            ffmpeg_input_file = input_file.replace('\\', '/')
+            ffmpeg_output_pattern = os.path.join(output_folder, f"part_%04d{ext}").replace('\\', '/')
+            
+            self.log("开始拆分音频文件...")
+            # 使用segment封装器一次读取完成所有分段，-c copy 保持无损
+            cmd = ['ffmpeg', '-i', ffmpeg_input_file, '-map', '0:a', '-c', 'copy',
+                   '-f', 'segment'] + segment_args + ['-segment_start_number', '1',
+                   '-reset_timestamps', '1', '-y', ffmpeg_output_pattern]
+            self.log(f"执行FFmpeg无损拆分命令: {' '.join(cmd)}")
+            result = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            
+            if result.returncode != 0:
+                self.log(f"FFmpeg无损拆分失败输出: {result.stderr}")
+                raise Exception(f"FFmpeg无损拆分失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
+            
+            parts = sorted(f for f in os.listdir(output_folder) if f.startswith('part_') and f.endswith(ext))
+            self.log(f"音频文件拆分成功，共 {len(parts)} 段: {output_folder}")
+            sg.popup(f"音频文件拆分成功，共 {len(parts)} 段\n输出文件夹: {output_folder}")
+            return [os.path.join(output_folder, f) for f in parts]
+        except Exception as e:
+            self.log(f"拆分音频文件失败: {str(e)}")
+            sg.popup_error(f"拆分音频文件失败: {str(e)}")
+            return []
+    
     def convert_audio_format(self, folder_path, audio_files, output_format):
         """转换音频文件格式（兼容旧接口）"""
         # 创建一个临时的values字典来传递参数
@@ -582,10 +1130,261 @@ class AudioProcessor:
             '-CHANNELS-': '2',
             '-SAMPLE_RATE-': '44100',
             '-START_TIME-': '',
-            '-END_TIME-': ''
+            '-END_TIME-': '',
+            '-PARALLEL-': False,
+            '-WORKERS-': ''
         }
         return self.perform_conversion(folder_path, audio_files, values)
     
+    def convert_values_from_config(self):
+        """根据保存的转换配置生成转换参数字典（与转换窗口的values格式一致）"""
+        return {
+            '-OUTPUT_FORMAT-': self.convert_config.get('format', 'mp3'),
+            '-CODEC-': self.convert_config.get('codec', 'libmp3lame'),
+            '-BITRATE-': self.convert_config.get('bitrate', '192k'),
+            '-CHANNELS-': self.convert_config.get('channels', '2'),
+            '-SAMPLE_RATE-': self.convert_config.get('sample_rate', '44100'),
+            '-START_TIME-': self.convert_config.get('start_time', ''),
+            '-END_TIME-': self.convert_config.get('end_time', ''),
+            '-PARALLEL-': self.convert_config.get('parallel', False),
+            '-WORKERS-': self.convert_config.get('workers', '')
+        }
+    
+    def parse_time_value(self, time_str):
+        """将 HH:MM:SS、MM:SS 或秒数格式的时间字符串转换为秒数，空值返回None"""
+        if not time_str or not str(time_str).strip():
+            return None
+        seconds = 0.0
+        for part in str(time_str).strip().split(':'):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    
+    def get_worker_count(self, values):
+        """获取并行进程数，未配置时使用CPU核心数"""
+        try:
+            workers = int(values.get('-WORKERS-') or 0)
+        except (TypeError, ValueError):
+            workers = 0
+        return workers if workers > 0 else (os.cpu_count() or 1)
+    
+    def build_encode_args(self, values):
+        """根据转换参数构建ffmpeg音频编码参数"""
+        return ['-c:a', values['-CODEC-'],
+                '-b:a', values['-BITRATE-'],
+                '-ac', values['-CHANNELS-'],
+                '-ar', values['-SAMPLE_RATE-']]
+    
+    def run_ffmpeg(self, cmd):
+        """执行ffmpeg命令并返回执行结果（可在工作线程中调用，不写日志）"""
+        return subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    
+    def build_conversion_command(self, input_file, output_file, values):
+        """构建使用单个ffmpeg进程转换一个文件的命令"""
+        # 执行ffmpeg转换命令前，确保所有路径使用正斜杠格式
+        cmd = ['ffmpeg', '-i', input_file.replace('\\', '/')]
+        
+        # 添加时间裁剪参数
+        if values['-START_TIME-']:
+            cmd.extend(['-ss', values['-START_TIME-']])
+        if values['-END_TIME-']:
+            cmd.extend(['-to', values['-END_TIME-']])
+        
+        # 只输出第一条音频流，与分段并行编码保持一致（忽略封面图片等其他流）
+        cmd.extend(['-map', '0:a:0'])
+        
+        # 添加音频编码参数、覆盖输出参数和输出文件路径
+        cmd.extend(self.build_encode_args(values))
+        cmd.extend(['-y', output_file.replace('\\', '/')])
+        
+        return cmd
+    
+    def build_remux_command(self, input_file, output_file):
+        """构建只转换封装格式、不重新编码的ffmpeg命令"""
+        return ['ffmpeg', '-i', input_file.replace('\\', '/'), '-map', '0:a:0', '-c:a', 'copy',
+                '-y', output_file.replace('\\', '/')]
+    
+    def copy_audio_file(self, input_file, output_file):
+        """直接复制文件，返回与ffmpeg执行结果相同格式的结果"""
+        shutil.copy2(input_file, output_file)
+        return subprocess.CompletedProcess(['copy', input_file, output_file], 0, '', '')
+    
+    def parse_bitrate(self, bitrate):
+        """将 192k、1.5M 等比特率字符串转换为每秒比特数"""
+        bitrate = str(bitrate).strip().lower()
+        if bitrate.endswith('k'):
+            return float(bitrate[:-1]) * 1000
+        if bitrate.endswith('m'):
+            return float(bitrate[:-1]) * 1000000
+        return float(bitrate)
+    
+    def classify_conversion(self, file, info, values):
+        """判断文件的处理方式: 'copy' 直接复制、'remux' 只转换封装、'encode' 重新编码、'skip' 跳过
+        
+        只有编码参数与设置完全一致时才不重新编码
+        """
+        audio_stream = None
+        for stream in (info or {}).get('streams', []):
+            if stream.get('codec_type') == 'audio':
+                audio_stream = stream
+                break
+        if not audio_stream:
+            return 'skip'
+        
+        # 需要裁剪时间时必须重新编码
+        if values['-START_TIME-'] or values['-END_TIME-']:
+            return 'encode'
+        
+        # 编码、采样率、声道数都与目标一致时才能不重新编码
+        codec_name = self.ENCODER_CODEC_NAMES.get(values['-CODEC-'], values['-CODEC-'])
+        if (audio_stream.get('codec_name') != codec_name
+                or str(audio_stream.get('sample_rate')) != str(values['-SAMPLE_RATE-'])
+                or str(audio_stream.get('channels')) != str(values['-CHANNELS-'])):
+            return 'encode'
+        
+        # 有损编码还要求音频流的比特率与目标完全一致（不使用整个文件的平均比特率），
+        # 比特率不同或无法确定（VBR等）时都重新编码
+        if not (codec_name.startswith('pcm_') or codec_name == 'flac'):
+            bit_rate = audio_stream.get('bit_rate')
+            if not bit_rate or int(bit_rate) != int(self.parse_bitrate(values['-BITRATE-'])):
+                return 'encode'
+        
+        input_format = os.path.splitext(file)[1].lower().lstrip('.')
+        return 'copy' if input_format == values['-OUTPUT_FORMAT-'] else 'remux'
+    
+    def build_conversion_jobs(self, folder_path, audio_files, values, infos):
+        """根据探测数据生成转换任务列表，转换和转换计划共用"""
+        output_format = values['-OUTPUT_FORMAT-']
+        output_folder = os.path.join(folder_path, f"converted_{output_format}")
+        parallel = values.get('-PARALLEL-', False)
+        workers = self.get_worker_count(values) if parallel else 1
+        start = self.parse_time_value(values['-START_TIME-']) or 0.0
+        end = self.parse_time_value(values['-END_TIME-'])
+        
+        jobs = []
+        for file in audio_files:
+            # 标准化输入、输出文件路径
+            input_file = os.path.normpath(os.path.join(folder_path, file))
+            base_name = os.path.splitext(file)[0]
+            output_file = os.path.normpath(os.path.join(output_folder, f"{base_name}.{output_format}"))
+            
+            info = infos.get(file)
+            action = self.classify_conversion(file, info, values)
+            source_duration = float((info or {}).get('format', {}).get('duration', 0) or 0)
+            # 裁剪后的实际输出时长
+            duration = max(0.0, min(end if end is not None else source_duration, source_duration) - start)
+            # 需要重采样时分段起点不落在输入采样上，接缝处的重采样相位与一次性转换不同，不拆分
+            audio_stream = next((stream for stream in (info or {}).get('streams', [])
+                                 if stream.get('codec_type') == 'audio'), {})
+            chunked = (action == 'encode' and parallel and workers > 1
+                       and output_format in self.CHUNKABLE_FORMATS
+                       and str(audio_stream.get('sample_rate')) == str(values['-SAMPLE_RATE-'])
+                       and source_duration >= 2 * self.MIN_CHUNK_SECONDS)
+            jobs.append({
+                'file': file,
+                'input_file': input_file,
+                'output_file': output_file,
+                'action': action,
+                'source_duration': source_duration,
+                'duration': duration,
+                'chunked': chunked
+            })
+        return jobs
+    
+    def plan_chunks(self, range_start, range_end, workers, grid):
+        """将时间范围均分为不超过workers段，每段不短于MIN_CHUNK_SECONDS，分段边界按grid秒对齐"""
+        units = int((range_end - range_start) // grid)
+        count = max(1, min(workers, int((range_end - range_start) // self.MIN_CHUNK_SECONDS)))
+        chunks = []
+        for i in range(count):
+            chunk_start = range_start + (units * i // count) * grid
+            chunk_end = range_end if i == count - 1 else range_start + (units * (i + 1) // count) * grid
+            chunks.append((chunk_start, chunk_end))
+        return chunks
+    
+    def encode_chunk(self, input_file, chunk_file, chunk_start, chunk_end, is_first, is_last, open_ended, overlap, values):
+        """编码单个分段，返回 (ffmpeg执行结果, 拼接入点, 拼接出点)
+        
+        除第一段外，每段从 chunk_start 之前 overlap 秒处开始编码，
+        除最后一段外，每段多编码到 chunk_end 之后 overlap 秒处。
+        重叠部分在拼接时通过入点/出点裁掉，因此接缝处不会出现间隙或重复。
+        """
+        seek = chunk_start if is_first else chunk_start - overlap
+        
+        # 在 -i 之前使用 -ss 进行输入端定位，避免每个进程从头解码
+        cmd = ['ffmpeg']
+        if seek > 0:
+            cmd.extend(['-ss', f"{seek:.6f}"])
+        cmd.extend(['-i', input_file.replace('\\', '/')])
+        if not (is_last and open_ended):
+            encode_end = chunk_end if is_last else chunk_end + overlap
+            cmd.extend(['-t', f"{encode_end - seek:.6f}"])
+        cmd.extend(['-map', '0:a:0'])
+        cmd.extend(self.build_encode_args(values))
+        cmd.extend(['-y', chunk_file.replace('\\', '/')])
+        
+        result = self.run_ffmpeg(cmd)
+        inpoint = None if is_first else chunk_start - seek
+        outpoint = None if is_last else chunk_end - seek
+        return result, inpoint, outpoint
+    
+    def start_chunked_conversion(self, job, values, executor, workers):
+        """将长文件按时间分段，把各段的编码任务提交到共用线程池，返回拼接时需要的分段状态"""
+        input_file, output_file = job['input_file'], job['output_file']
+        output_format = values['-OUTPUT_FORMAT-']
+        range_start = self.parse_time_value(values['-START_TIME-']) or 0.0
+        range_end = self.parse_time_value(values['-END_TIME-'])
+        open_ended = range_end is None or range_end >= job['source_duration']
+        if open_ended:
+            range_end = job['source_duration']
+        
+        # 分段边界和重叠长度都按数据包对齐
+        grid = self.CHUNK_GRID_SAMPLES / int(values['-SAMPLE_RATE-'])
+        overlap = grid * self.CHUNK_OVERLAP_UNITS
+        chunks = self.plan_chunks(range_start, range_end, workers, grid)
+        self.log(f"分段并行编码 {job['file']}: {len(chunks)} 段，每段约 {int((range_end - range_start) / len(chunks))} 秒")
+        
+        # 分段文件保存在输出文件夹下的临时文件夹中
+        base_name = os.path.splitext(os.path.basename(output_file))[0]
+        chunk_folder = os.path.normpath(os.path.join(os.path.dirname(output_file), f".chunks_{base_name}"))
+        os.makedirs(chunk_folder, exist_ok=True)
+        
+        state = {
+            'job': job,
+            'chunk_folder': chunk_folder,
+            'chunk_files': [],
+            'futures': [],
+            'results': [None] * len(chunks),
+            'remaining': len(chunks),
+            # 出点写入列表时只保留微秒精度，提前半个采样，避免舍入后多保留接缝处的一个数据包
+            # （入点按最接近的采样定位，微秒精度足够）
+            'margin': 0.5 / int(values['-SAMPLE_RATE-'])
+        }
+        for index, (chunk_start, chunk_end) in enumerate(chunks):
+            chunk_file = os.path.join(chunk_folder, f"chunk_{index:03d}.{output_format}")
+            state['chunk_files'].append(chunk_file)
+            state['futures'].append(executor.submit(
+                self.encode_chunk, input_file, chunk_file, chunk_start, chunk_end,
+                index == 0, index == len(chunks) - 1, open_ended, overlap, values))
+        return state
+    
+    def concat_chunks(self, state):
+        """生成带入点/出点的拼接列表，裁掉各段的重叠部分后流复制拼接为一个文件"""
+        list_file = os.path.join(state['chunk_folder'], 'chunks.txt')
+        with open(list_file, 'w', encoding='utf-8') as f:
+            for chunk_file, inpoint, outpoint in state['results']:
+                # 使用正斜杠路径，写入符合FFmpeg concat协议格式的路径
+                ffmpeg_chunk_file = os.path.normpath(chunk_file).replace('\\', '/')
+                f.write(f"file '{ffmpeg_chunk_file}'\n")
+                if inpoint is not None:
+                    f.write(f"inpoint {inpoint:.6f}\n")
+                if outpoint is not None:
+                    f.write(f"outpoint {outpoint - state['margin']:.6f}\n")
+        
+        cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_file.replace('\\', '/'),
+               '-c', 'copy', '-y', state['job']['output_file'].replace('\\', '/')]
+        self.log(f"执行FFmpeg分段拼接命令: {' '.join(cmd)}")
+        return self.run_ffmpeg(cmd)
+    
     def perform_conversion(self, folder_path, audio_files, values):
         """执行音频转换，支持自定义参数"""
         if not audio_files:
@@ -603,64 +1402,110 @@ class AudioProcessor:
         sample_rate = values['-SAMPLE_RATE-']
         start_time = values['-START_TIME-']
         end_time = values['-END_TIME-']
+        parallel = values.get('-PARALLEL-', False)
+        workers = self.get_worker_count(values) if parallel else 1
         
         # 创建输出文件夹
         output_folder = os.path.join(folder_path, f"converted_{output_format}")
         os.makedirs(output_folder, exist_ok=True)
         
-
-        
         success_count = 0
         
         try:
-            for file in audio_files:
-                input_file = os.path.join(folder_path, file)
-                # 标准化输入文件路径
-                input_file = os.path.normpath(input_file)
-                
-                base_name = os.path.splitext(file)[0]
-                output_file = os.path.join(output_folder, f"{base_name}.{output_format}")
-                # 标准化输出文件路径
-                output_file = os.path.normpath(output_file)
-                
-                self.log(f"正在转换: {file} -> {output_file}")
-                self.log(f"转换参数 - 编码器: {codec}, 比特率: {bitrate}, 声道: {channels}, 采样率: {sample_rate}")
-                
-                # 执行ffmpeg转换命令前，确保所有路径使用正斜杠格式
-                ffmpeg_input_file = input_file.replace('\\', '/')
-                ffmpeg_output_file = output_file.replace('\\', '/')
-                
-                # 构建命令参数
-                cmd = ['ffmpeg', '-i', ffmpeg_input_file]
-                
-                # 添加时间裁剪参数
-                if start_time:
-                    cmd.extend(['-ss', start_time])
-                    self.log(f"应用起始时间: {start_time}")
-                if end_time:
-                    cmd.extend(['-to', end_time])
-                    self.log(f"应用结束时间: {end_time}")
-                
-                # 添加音频编码参数
-                cmd.extend(['-c:a', codec])
-                cmd.extend(['-b:a', bitrate])
-                cmd.extend(['-ac', channels])
-                cmd.extend(['-ar', sample_rate])
-                
-                # 添加覆盖输出参数和输出文件路径
-                cmd.extend(['-y', ffmpeg_output_file])
-                
-                # 执行转换命令
-                self.log(f"执行FFmpeg转换命令: {' '.join(cmd)}")
-                result = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                
-                if result.returncode != 0:
-                    self.log(f"FFmpeg错误输出: {result.stderr}")
-                    self.log(f"FFmpeg标准输出: {result.stdout}")
-                    raise Exception(f"FFmpeg命令失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
-                
-                success_count += 1
-                self.log(f"转换成功: {file}")
+            # 探测所有文件并生成转换任务列表（与转换计划使用相同的判断）
+            infos = self.probe_audio_files(folder_path, audio_files, self.get_worker_count(values))
+            jobs = self.build_conversion_jobs(folder_path, audio_files, values, infos)
+            
+            self.log(f"转换参数 - 编码器: {codec}, 比特率: {bitrate}, 声道: {channels}, 采样率: {sample_rate}")
+            if start_time:
+                self.log(f"应用起始时间: {start_time}")
+            if end_time:
+                self.log(f"应用结束时间: {end_time}")
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # 并行模式下，足够长的文件拆分为多段并行编码，所有文件的分段和其他文件一起提交到线程池
+                futures = {}  # future -> (任务, 分段状态, 分段序号)，拼接任务的分段序号为None
+                chunk_states = []
+                try:
+                    for job in jobs:
+                        file, input_file, output_file = job['file'], job['input_file'], job['output_file']
+                        if job['action'] == 'skip':
+                            self.log(f"跳过无法识别的音频文件: {file}")
+                            continue
+                        if job['chunked']:
+                            self.log(f"正在分段并行转换: {file} -> {output_file}")
+                            state = self.start_chunked_conversion(job, values, executor, workers)
+                            chunk_states.append(state)
+                            for index, future in enumerate(state['futures']):
+                                futures[future] = (job, state, index)
+                            continue
+                        
+                        if job['action'] == 'copy':
+                            # 已经是目标格式和参数，直接复制
+                            self.log(f"正在复制: {file} -> {output_file}")
+                            future = executor.submit(self.copy_audio_file, input_file, output_file)
+                        else:
+                            self.log(f"正在转换: {file} -> {output_file}")
+                            if job['action'] == 'remux':
+                                # 编码参数已符合要求，只转换封装格式
+                                cmd = self.build_remux_command(input_file, output_file)
+                            else:
+                                cmd = self.build_conversion_command(input_file, output_file, values)
+                            self.log(f"执行FFmpeg转换命令: {' '.join(cmd)}")
+                            future = executor.submit(self.run_ffmpeg, cmd)
+                        futures[future] = (job, None, None)
+                    
+                    # 出错后取消尚未开始的任务，但仍统计正在执行的任务的结果，最后再报告错误
+                    error = None
+                    pending = set(futures)
+                    while pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            if future.cancelled():
+                                continue
+                            job, state, index = futures[future]
+                            file = job['file']
+                            try:
+                                if state is not None and index is not None:
+                                    result, inpoint, outpoint = future.result()
+                                    if result.returncode != 0:
+                                        self.log(f"FFmpeg错误输出: {result.stderr}")
+                                        raise Exception(f"{file} 分段 {index} 编码失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
+                                    state['results'][index] = (state['chunk_files'][index], inpoint, outpoint)
+                                    state['remaining'] -= 1
+                                    self.log(f"{file} 分段 {index + 1}/{len(state['results'])} 编码完成")
+                                    if state['remaining'] == 0 and error is None:
+                                        # 该文件的分段全部完成后立即拼接，不等待其他文件
+                                        concat_future = executor.submit(self.concat_chunks, state)
+                                        futures[concat_future] = (job, state, None)
+                                        pending.add(concat_future)
+                                    continue
+                                
+                                result = future.result()
+                                if result.returncode != 0:
+                                    self.log(f"FFmpeg错误输出: {result.stderr}")
+                                    self.log(f"FFmpeg标准输出: {result.stdout}")
+                                    raise Exception(f"{file} 转换失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
+                            except Exception as e:
+                                if error is None:
+                                    error = e
+                                    for other in futures:
+                                        other.cancel()
+                                continue
+                            if state is not None:
+                                shutil.rmtree(state['chunk_folder'], ignore_errors=True)
+                            success_count += 1
+                            self.log(f"转换成功: {file}")
+                    if error is not None:
+                        raise error
+                finally:
+                    # 出错时取消尚未开始的任务（Python 3.7没有cancel_futures），
+                    # 等待正在执行的ffmpeg进程结束后再删除分段临时文件夹
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+                    for state in chunk_states:
+                        shutil.rmtree(state['chunk_folder'], ignore_errors=True)
             
             self.log(f"格式转换完成，成功转换 {success_count}/{len(audio_files)} 个文件")
             sg.popup(f"格式转换完成，成功转换 {success_count}/{len(audio_files)} 个文件\n输出文件夹: {output_folder}")
@@ -674,16 +1519,315 @@ class AudioProcessor:
                     'channels': channels,
                     'sample_rate': sample_rate,
                     'start_time': start_time,
-                    'end_time': end_time
+                    'end_time': end_time,
+                    'parallel': parallel,
+                    'workers': values.get('-WORKERS-', '')
                 }
                 self.save_config()
             
             return True
         except Exception as e:
             self.log(f"格式转换失败: {str(e)}")
-            sg.popup_error(f"格式转换失败: {str(e)}")
+            self.log(f"已成功转换 {success_count}/{len(audio_files)} 个文件，其余未开始的转换已取消")
+            sg.popup_error(f"格式转换失败: {str(e)}\n\n已成功转换 {success_count}/{len(audio_files)} 个文件，"
+                           f"其余未开始的转换已取消\n输出文件夹: {output_folder}")
             return False
     
+    def calibrate_encode_speed(self, values):
+        """编码一段测试音频，测量本机的编码速度（倍实时）"""
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'lavfi',
+               '-i', f"anoisesrc=d={self.CALIBRATION_SECONDS}:c=pink:r={values['-SAMPLE_RATE-']}:a=0.3"]
+        cmd.extend(self.build_encode_args(values))
+        cmd.extend(['-f', 'null', '-'])
+        self.log(f"校准编码速度: {' '.join(cmd)}")
+        started = time.time()
+        result = self.run_ffmpeg(cmd)
+        elapsed = max(time.time() - started, 0.001)
+        if result.returncode != 0:
+            raise Exception(f"编码速度校准失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
+        return self.CALIBRATION_SECONDS / elapsed
+    
+    def calibrate_process_overhead(self):
+        """测量本机的ffmpeg进程启动开销（秒）"""
+        started = time.time()
+        self.run_ffmpeg(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'anullsrc', '-t', '0.1', '-f', 'null', '-'])
+        return time.time() - started
+    
+    def existing_folder(self, folder):
+        """返回文件夹本身或其最近的已存在的上级文件夹"""
+        folder = os.path.abspath(folder)
+        while not os.path.exists(folder):
+            folder = os.path.dirname(folder)
+        return folder
+    
+    def sync_file(self, file_path):
+        """将文件内容写入磁盘，使复制速度的测量包含实际写盘时间"""
+        with open(file_path, 'rb+') as f:
+            os.fsync(f.fileno())
+    
+    def calibrate_copy_speed(self, output_folder, overhead):
+        """在输出文件夹所在的磁盘上测量ffmpeg流复制速度和文件直接复制速度（字节/秒）"""
+        with tempfile.TemporaryDirectory(prefix='.calibration_', dir=self.existing_folder(output_folder)) as temp_folder:
+            source = os.path.join(temp_folder, 'calibration.wav').replace('\\', '/')
+            target = os.path.join(temp_folder, 'calibration_copy.wav').replace('\\', '/')
+            self.log(f"校准复制速度: {temp_folder}")
+            result = self.run_ffmpeg(['ffmpeg', '-v', 'error', '-f', 'lavfi',
+                                      '-i', f"anoisesrc=d={self.CALIBRATION_COPY_SECONDS}:c=pink:r=44100:a=0.3",
+                                      '-ac', '2', '-y', source])
+            if result.returncode != 0:
+                raise Exception(f"流复制速度校准失败，退出代码: {result.returncode}\n错误输出: {result.stderr}")
+            source_size = os.path.getsize(source)
+            
+            # 扣除进程启动开销，估算时再单独计入一次
+            started = time.time()
+            self.run_ffmpeg(['ffmpeg', '-v', 'error', '-i', source, '-c', 'copy', '-y', target])
+            self.sync_file(target)
+            copy_speed = source_size / max(time.time() - started - overhead, 0.001)
+            
+            # 扩展名相同的文件用shutil.copy2直接复制，单独测量
+            file_copy_target = os.path.join(temp_folder, 'calibration_file_copy.wav')
+            started = time.time()
+            shutil.copy2(source, file_copy_target)
+            self.sync_file(file_copy_target)
+            file_copy_speed = source_size / max(time.time() - started, 0.001)
+        return copy_speed, file_copy_speed
+    
+    def get_calibration(self, values_list, output_folder):
+        """获取本机各编码器的编码速度和输出磁盘的复制速度，没有缓存或FFmpeg版本变化时先执行一次短时校准"""
+        cache = self.calibration_cache
+        if cache.get('ffmpeg_version') != self.ffmpeg_version:
+            cache = {'ffmpeg_version': self.ffmpeg_version, 'encode_speed': {}}
+        
+        changed = cache is not self.calibration_cache
+        # 旧版本在系统临时文件夹中测得的复制速度不再使用
+        for key in ('copy_bytes_per_second', 'file_copy_bytes_per_second'):
+            if cache.pop(key, None) is not None:
+                changed = True
+        if 'process_overhead' not in cache:
+            cache['process_overhead'] = self.calibrate_process_overhead()
+            changed = True
+        
+        # 复制速度取决于输出文件夹所在的磁盘，按磁盘分别校准
+        disk = str(os.stat(self.existing_folder(output_folder)).st_dev)
+        disk_speed = cache.setdefault('disk_speed', {})
+        if disk not in disk_speed:
+            copy_speed, file_copy_speed = self.calibrate_copy_speed(output_folder, cache['process_overhead'])
+            disk_speed[disk] = {'copy_bytes_per_second': copy_speed, 'file_copy_bytes_per_second': file_copy_speed}
+            self.log(f"复制速度校准完成: 流复制 {self.format_size(copy_speed)}/秒，文件复制 {self.format_size(file_copy_speed)}/秒")
+            changed = True
+        for values in values_list:
+            codec = values['-CODEC-']
+            if codec not in cache['encode_speed']:
+                cache['encode_speed'][codec] = self.calibrate_encode_speed(values)
+                self.log(f"编码速度校准完成: {codec} {cache['encode_speed'][codec]:.1f} 倍实时")
+                changed = True
+        
+        # 校准结果保存到配置文件，之后直接使用
+        if changed:
+            cache['calibrated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.calibration_cache = cache
+            self.save_config()
+        # 返回编码速度和当前输出磁盘的复制速度
+        return dict(cache, **disk_speed[disk])
+    
+    def estimate_encoded_bytes(self, seconds, values):
+        """根据编码参数估算编码后的文件大小（字节）"""
+        codec = values['-CODEC-']
+        pcm_bytes = seconds * int(values['-SAMPLE_RATE-']) * int(values['-CHANNELS-']) * 2
+        if codec.startswith('pcm_'):
+            # pcm_s16le、pcm_s24le、pcm_f32le 按位深计算
+            bits = int(re.search(r'\d+', codec).group())
+            return pcm_bytes * bits / 16
+        if codec == 'flac':
+            # 无损压缩，按16位PCM大小的60%估算
+            return pcm_bytes * 0.6
+        # 有损编码按比特率计算，另加1%的封装开销
+        return seconds * self.parse_bitrate(values['-BITRATE-']) / 8 * 1.01
+    
+    def schedule_wall_time(self, durations, workers):
+        """按最长任务优先的方式将任务分配到workers个进程，返回总耗时"""
+        loads = [0.0] * max(1, workers)
+        for duration in sorted(durations, reverse=True):
+            heapq.heappush(loads, heapq.heappop(loads) + duration)
+        return max(loads)
+    
+    def plan_conversion(self, folder_path, audio_files, values):
+        """生成转换计划（只探测和估算，不执行任何转换）"""
+        folder_path = os.path.normpath(folder_path)
+        parallel = values.get('-PARALLEL-', False)
+        workers = self.get_worker_count(values) if parallel else 1
+        
+        infos = self.probe_audio_files(folder_path, audio_files, self.get_worker_count(values))
+        jobs = self.build_conversion_jobs(folder_path, audio_files, values, infos)
+        output_folder = os.path.join(folder_path, f"converted_{values['-OUTPUT_FORMAT-']}")
+        calibration = self.get_calibration([values], output_folder)
+        encode_speed = calibration['encode_speed'][values['-CODEC-']]
+        copy_speed = calibration['copy_bytes_per_second']
+        file_copy_speed = calibration['file_copy_bytes_per_second']
+        overhead = calibration['process_overhead']
+        
+        # 估算每个任务的输出大小和耗时
+        task_times = []
+        for job in jobs:
+            input_size = os.path.getsize(job['input_file'])
+            job['input_bytes'] = input_size
+            if job['action'] == 'skip':
+                job['output_bytes'], job['seconds'] = 0, 0.0
+                continue
+            if job['action'] == 'copy':
+                job['output_bytes'], job['seconds'] = input_size, input_size / file_copy_speed
+            elif job['action'] == 'remux':
+                job['output_bytes'], job['seconds'] = input_size, input_size / copy_speed + overhead
+            else:
+                job['output_bytes'] = self.estimate_encoded_bytes(job['duration'], values)
+                job['seconds'] = job['duration'] / encode_speed + overhead
+            
+            if job['chunked']:
+                # 各分段和其他文件一起在线程池中并行编码，之后再流复制拼接
+                grid = self.CHUNK_GRID_SAMPLES / int(values['-SAMPLE_RATE-'])
+                start = self.parse_time_value(values['-START_TIME-']) or 0.0
+                chunks = len(self.plan_chunks(start, start + job['duration'], workers, grid))
+                chunk_seconds = job['duration'] / encode_speed / chunks + overhead
+                concat_seconds = job['output_bytes'] / copy_speed + overhead
+                job['seconds'] = chunk_seconds + concat_seconds
+                task_times.extend([chunk_seconds] * chunks + [concat_seconds])
+            else:
+                task_times.append(job['seconds'])
+        
+        return {
+            'title': '转换计划',
+            'settings': (f"输出格式: {values['-OUTPUT_FORMAT-']}，编码器: {values['-CODEC-']}，比特率: {values['-BITRATE-']}，"
+                         f"声道: {values['-CHANNELS-']}，采样率: {values['-SAMPLE_RATE-']}"),
+            'workers': workers,
+            'jobs': jobs,
+            'output_folders': {output_folder: sum(job['output_bytes'] for job in jobs)},
+            'wall_seconds': self.schedule_wall_time(task_times, workers),
+            'calibration': calibration,
+            'notes': []
+        }
+    
+    def plan_merge(self, folder_path, audio_files):
+        """生成合并计划（只探测和估算，不执行合并）"""
+        folder_path = os.path.normpath(folder_path)
+        infos = self.probe_audio_files(folder_path, audio_files, os.cpu_count() or 1)
+        
+        jobs = []
+        stream_params = set()
+        for file in audio_files:
+            input_file = os.path.normpath(os.path.join(folder_path, file))
+            info = infos.get(file)
+            audio_stream = next((stream for stream in (info or {}).get('streams', [])
+                                 if stream.get('codec_type') == 'audio'), None)
+            if audio_stream:
+                stream_params.add((audio_stream.get('codec_name'), audio_stream.get('sample_rate'),
+                                   audio_stream.get('channels')))
+            jobs.append({
+                'file': file,
+                'input_file': input_file,
+                'action': 'copy' if audio_stream else 'skip',
+                'duration': float((info or {}).get('format', {}).get('duration', 0) or 0),
+                'input_bytes': os.path.getsize(input_file)
+            })
+        
+        # 与merge_audio_files一致，输出格式与第一个文件相同
+        output_format = os.path.splitext(audio_files[0])[1].lower().lstrip('.') or 'mp3'
+        notes = []
+        total_bytes = sum(job['input_bytes'] for job in jobs)
+        total_seconds = sum(job['duration'] for job in jobs)
+        
+        if len(stream_params) > 1:
+            # 编码参数不一致时无损合并可能失败，按重新编码合并估算
+            notes.append(f"文件的编码参数不一致（{len(stream_params)} 种），无损合并可能失败，以下按重新编码合并估算")
+            codec = {'mp3': 'libmp3lame', 'wav': 'pcm_s16le', 'flac': 'flac'}.get(output_format, 'aac')
+            _, sample_rate, channels = sorted(stream_params, key=str)[0]
+            values = {'-CODEC-': codec, '-BITRATE-': '192k', '-SAMPLE_RATE-': str(sample_rate or 44100),
+                      '-CHANNELS-': str(channels or 2)}
+            calibration = self.get_calibration([values], folder_path)
+            output_bytes = self.estimate_encoded_bytes(total_seconds, values)
+            wall_seconds = total_seconds / calibration['encode_speed'][codec] + calibration['process_overhead']
+            for job in jobs:
+                if job['action'] != 'skip':
+                    job['action'] = 'encode'
+        else:
+            calibration = self.get_calibration([], folder_path)
+            output_bytes = total_bytes
+            wall_seconds = total_bytes / calibration['copy_bytes_per_second'] + calibration['process_overhead']
+        
+        skipped = sum(1 for job in jobs if job['action'] == 'skip')
+        if skipped:
+            notes.append(f"{skipped} 个文件无法识别，合并时可能导致失败")
+        
+        # 合并为一个输出文件，逐个文件只估算输入大小和时长
+        for job in jobs:
+            job['output_bytes'] = 0
+            job['seconds'] = 0.0
+        return {
+            'title': '合并计划',
+            'settings': f"输出格式: {output_format}（与第一个文件相同）",
+            'workers': 1,
+            'jobs': jobs,
+            'output_folders': {folder_path: output_bytes},
+            'wall_seconds': wall_seconds,
+            'calibration': calibration,
+            'notes': notes
+        }
+    
+    def format_duration(self, seconds):
+        """将秒数格式化为 H:MM:SS"""
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    
+    def format_size(self, size):
+        """将字节数格式化为易读的大小"""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
+    
+    def format_plan(self, plan):
+        """将转换或合并计划格式化为文本"""
+        action_names = {'copy': '复制', 'remux': '转换封装', 'encode': '重新编码', 'skip': '跳过'}
+        jobs = plan['jobs']
+        lines = [f"{plan['title']}（仅为预估，未执行任何操作）", plan['settings'], '']
+        
+        for job in jobs:
+            line = f"[{action_names[job['action']]}] {job['file']}  时长 {self.format_duration(job['duration'])}"
+            if job['output_bytes']:
+                line += f"  预计输出 {self.format_size(job['output_bytes'])}"
+            if job['seconds']:
+                line += f"  预计耗时 {self.format_duration(job['seconds'])}"
+            if job.get('chunked'):
+                line += "（分段并行）"
+            lines.append(line)
+        
+        counts = {action: sum(1 for job in jobs if job['action'] == action) for action in action_names}
+        lines.append('')
+        lines.append('，'.join(f"{action_names[action]} {count} 个" for action, count in counts.items()))
+        lines.append(f"输入总时长: {self.format_duration(sum(job['duration'] for job in jobs))}，"
+                     f"输入总大小: {self.format_size(sum(job['input_bytes'] for job in jobs))}")
+        
+        # 输出文件夹所在磁盘的剩余空间
+        for output_folder, output_bytes in plan['output_folders'].items():
+            free_bytes = shutil.disk_usage(self.existing_folder(output_folder)).free
+            status = '空间充足' if free_bytes > output_bytes else '空间不足！'
+            lines.append(f"输出 {output_folder}: 预计 {self.format_size(output_bytes)}，"
+                         f"磁盘剩余 {self.format_size(free_bytes)}（{status}）")
+        
+        lines.append(f"预计总耗时: {self.format_duration(plan['wall_seconds'])}（并行进程数: {plan['workers']}）")
+        
+        calibration = plan['calibration']
+        speeds = '，'.join(f"{codec} {speed:.1f} 倍实时" for codec, speed in calibration['encode_speed'].items())
+        lines.append(f"本机校准（{calibration.get('calibrated_at', '')}）: 输出磁盘流复制 "
+                     f"{self.format_size(calibration['copy_bytes_per_second'])}/秒，文件复制 "
+                     f"{self.format_size(calibration['file_copy_bytes_per_second'])}/秒" + (f"，{speeds}" if speeds else ''))
+        if counts['copy'] or counts['remux']:
+            # 校准文件刚写入，读取时在系统缓存中；大量未缓存的输入文件读取更慢
+            lines.append("复制和转换封装的耗时为下限估算：校准时的测试文件读取自系统缓存，大量文件从磁盘读取时实际耗时可能更长")
+        lines.extend(plan['notes'])
+        return '\n'.join(lines)
+    
     def run(self):
         """运行应用程序"""
         while True:
@@ -730,14 +1874,540 @@ class AudioProcessor:
                 if audio_files:
                     self.merge_audio_files(folder_path, audio_files)
             
+            if event == '-PLAN_MERGE-':
+                folder_path = values['-FOLDER-']
+                if not folder_path:
+                    sg.popup_error('请先选择文件夹！')
+                    continue
+                
+                audio_files = self.scan_folder(folder_path)
+                if audio_files:
+                    try:
+                        plan = self.plan_merge(folder_path, audio_files)
+                        plan_text = self.format_plan(plan)
+                        self.log(f"{plan['title']}: {len(plan['jobs'])} 个文件，预计总耗时 {self.format_duration(plan['wall_seconds'])}")
+                        sg.popup_scrolled(plan_text, title='合并计划', size=(100, 30))
+                    except Exception as e:
+                        self.log(f"生成合并计划失败: {str(e)}")
+                        sg.popup_error(f"生成合并计划失败: {str(e)}")
+            
+            if event == '-SPLIT-':
+                # 打开单独的拆分音频页面
+                self.split_audio_window()
+            
             if event == '-CONVERT-':
                 # 打开单独的转换格式页面
                 self.convert_format_window()
         
         self.window.close()
 
+class FolderWatcher:
+    """监控文件夹，自动处理录制完成的新音频分段"""
+    
+    # 使用文件事件时，没有待处理文件情况下的兜底重新扫描间隔（秒）
+    IDLE_RESCAN_SECONDS = 60
+    # 处理失败的文件的重试间隔（秒）
+    RETRY_SECONDS = 60
+    # 转换失败的文件最多尝试的次数，超过后放弃
+    MAX_CONVERT_ATTEMPTS = 3
+    # 保存在每个监控文件夹中的处理记录，重新启动后据此判断哪些文件已处理
+    STATE_FILE = 'watch_state.json'
+    
+    def __init__(self, processor, folders, watch_config):
+        self.processor = processor
+        self.folders = [os.path.normpath(folder) for folder in folders if folder]
+        self.action = watch_config.get('action', 'convert')
+        self.poll_interval = float(watch_config.get('poll_interval', 5))
+        self.stable_seconds = float(watch_config.get('stable_seconds', 10))
+        self.merge_interval = float(watch_config.get('merge_interval', 600))
+        self.status_port = int(watch_config.get('status_port', 0) or 0)
+        
+        # 转换参数来自保存的转换配置
+        self.values = processor.convert_values_from_config()
+        self.workers = processor.get_worker_count(self.values)
+        
+        self.lock = threading.Lock()
+        # 已成功处理的文件（保存到处理记录中）
+        self.handled = {folder: self.load_state(folder) for folder in self.folders}
+        # 已接手的文件（已处理、处理中或等待重试），扫描时不再作为新文件
+        self.known_files = {folder: self.initial_known_files(folder) for folder in self.folders}
+        # 正在写入的文件: 路径 -> (大小, 修改时间, 开始稳定的时间)
+        self.pending = {}
+        # 已交给转换或合并、尚未完成的文件路径
+        self.in_progress = set()
+        # 等待转换重试的文件: 路径 -> (文件夹, 文件名, 第几次尝试, 重试时间)
+        self.convert_retries = {}
+        # 等待追加合并的文件: (文件夹, 扩展名) -> [文件名]，按到达顺序排列，追加失败的文件留在队首
+        self.merge_queues = {}
+        # 每个合并文件下次可以追加（或重写）的时间，以及追加失败、暂停追加的合并文件
+        self.next_merge_at = {}
+        self.blocked_merges = set()
+        # 每个合并文件最后追加的文件序号，用于发现补录的旧分段
+        self.last_merged_number = {}
+        
+        # 常驻的工作线程池，每个任务运行一个ffmpeg进程
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.observer = None
+        self.status_server = None
+        
+        # 运行统计
+        self.stats = {
+            'queued': 0,
+            'running': 0,
+            'processed': 0,
+            'failed': 0,
+            'processed_bytes': 0,
+            'processed_seconds': 0.0
+        }
+        self.start_time = time.time()
+    
+    def list_audio_files(self, folder):
+        """列出文件夹中的输入音频文件（不包含合并输出文件）"""
+        try:
+            with os.scandir(folder) as entries:
+                files = [entry.name for entry in entries
+                         if entry.is_file()
+                         and os.path.splitext(entry.name)[1].lower() in self.processor.AUDIO_EXTENSIONS
+                         and not entry.name.startswith('merged_')]
+        except FileNotFoundError:
+            return []
+        return self.processor.sort_audio_files(files)
+    
+    def load_state(self, folder):
+        """读取文件夹的处理记录，返回已处理的文件名集合；从未监控过该文件夹时返回None"""
+        state_file = os.path.join(folder, self.STATE_FILE)
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                return set(json.load(f).get('handled', []))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.log(f"读取处理记录失败 {state_file}: {e}")
+            return None
+    
+    def save_state(self, folder):
+        """保存文件夹的处理记录（先写临时文件再替换，避免中断时记录损坏）"""
+        state_file = os.path.join(folder, self.STATE_FILE)
+        with self.lock:
+            handled = sorted(self.handled[folder])
+        temp_file = state_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'handled': handled}, f, ensure_ascii=False, indent=4)
+        os.replace(temp_file, state_file)
+    
+    def has_converted_output(self, folder, file, stat):
+        """转换模式下，输出文件已存在且不早于输入文件时视为已转换"""
+        if self.action == 'merge':
+            return False
+        output_format = self.values['-OUTPUT_FORMAT-']
+        output_file = os.path.join(folder, f"converted_{output_format}", f"{os.path.splitext(file)[0]}.{output_format}")
+        try:
+            return os.path.getmtime(output_file) >= stat.st_mtime
+        except OSError:
+            return False
+    
+    def initial_known_files(self, folder):
+        """确定启动时已处理的文件
+        
+        有处理记录时，只有记录中的文件（转换模式下还包括已有转换输出的文件）视为已处理，
+        监控停止期间到达的文件会被处理；首次监控该文件夹时，已写入完成的文件视为已处理。
+        最近仍在变化的文件都要经过写入完成检测，不会被当作已处理。
+        """
+        handled = self.handled[folder]
+        now = time.time()
+        known = set()
+        for file in self.list_audio_files(folder):
+            try:
+                stat = os.stat(os.path.join(folder, file))
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime < self.stable_seconds:
+                continue
+            if handled is None or file in handled or self.has_converted_output(folder, file, stat):
+                known.add(file)
+        
+        if handled is None:
+            self.handled[folder] = set(known)
+            try:
+                self.save_state(folder)
+            except OSError as e:
+                self.log(f"保存处理记录失败 {folder}: {e}")
+        return known
+    
+    def mark_handled(self, folder, files):
+        """记录已成功处理的文件"""
+        with self.lock:
+            self.handled[folder].update(files)
+            for file in files:
+                self.in_progress.discard(os.path.join(folder, file))
+        try:
+            self.save_state(folder)
+        except OSError as e:
+            self.log(f"保存处理记录失败 {folder}: {e}")
+    
+    def release_files(self, folder, files):
+        """尚未交给转换或合并的文件不再视为已接手，下次扫描时重新处理"""
+        with self.lock:
+            for file in files:
+                if os.path.join(folder, file) not in self.in_progress:
+                    self.known_files[folder].discard(file)
+    
+    def collect_ready_files(self):
+        """扫描新文件，返回大小和修改时间已稳定（写入完成）的文件，按文件夹分组"""
+        now = time.time()
+        ready = {}
+        for folder in self.folders:
+            for file in self.list_audio_files(folder):
+                if file in self.known_files[folder]:
+                    continue
+                file_path = os.path.join(folder, file)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    self.pending.pop(file_path, None)
+                    continue
+                
+                previous = self.pending.get(file_path)
+                if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+                    # 新文件或仍在写入，重新开始计时
+                    self.pending[file_path] = (stat.st_size, stat.st_mtime, now)
+                elif stat.st_size > 0 and now - previous[2] >= self.stable_seconds:
+                    del self.pending[file_path]
+                    self.known_files[folder].add(file)
+                    ready.setdefault(folder, []).append(file)
+        return ready
+    
+    def process_folder(self, folder, new_files):
+        """对一批新到达的文件执行缺失检查，并交给转换或追加合并"""
+        new_files = self.processor.sort_audio_files(new_files)
+        self.log(f"{folder} 新增 {len(new_files)} 个音频文件: {', '.join(new_files)}")
+        
+        for file in new_files:
+            if self.action == 'merge':
+                self.queue_merge(folder, file)
+            else:
+                self.start_conversion(folder, file, 1)
+        
+        # 检查数字序列是否有缺失
+        missing_numbers = self.processor.check_missing_audio_files(folder, self.list_audio_files(folder))
+        if missing_numbers:
+            self.log(f"{folder} 发现 {len(missing_numbers)} 个缺失的音频文件")
+    
+    def start_conversion(self, folder, file, attempt):
+        """探测文件并提交到常驻线程池转换，出错时安排重试"""
+        input_file = os.path.normpath(os.path.join(folder, file))
+        with self.lock:
+            self.in_progress.add(os.path.join(folder, file))
+        try:
+            # 与界面转换使用相同的判断，参数一致的文件直接复制或只转换封装（每个文件由一个进程处理，不分段）
+            info = self.processor.probe_audio_file(input_file)
+            job = self.processor.build_conversion_jobs(folder, [file], self.values, {file: info})[0]
+            if job['action'] == 'skip':
+                raise Exception("无法识别的音频文件")
+            # 大小和时长在提交任务前记录，避免完成回调中访问文件
+            input_bytes = os.path.getsize(input_file)
+            duration = job['duration']
+            
+            output_file = job['output_file']
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            if job['action'] == 'copy':
+                self.log(f"正在复制: {file} -> {output_file}")
+                task = (self.processor.copy_audio_file, input_file, output_file)
+            else:
+                if job['action'] == 'remux':
+                    cmd = self.processor.build_remux_command(input_file, output_file)
+                else:
+                    cmd = self.processor.build_conversion_command(input_file, output_file, self.values)
+                self.log(f"执行FFmpeg转换命令: {' '.join(cmd)}")
+                task = (self.processor.run_ffmpeg, cmd)
+        except Exception as e:
+            self.conversion_failed(folder, file, attempt, str(e))
+            return
+        
+        with self.lock:
+            self.stats['queued'] += 1
+        future = self.executor.submit(self.run_job, *task)
+        future.add_done_callback(
+            lambda f: self.job_done(f, folder, file, attempt, input_bytes, duration))
+    
+    def run_job(self, func, *args):
+        """在工作线程中执行转换任务（ffmpeg命令或文件复制）"""
+        with self.lock:
+            self.stats['queued'] -= 1
+            self.stats['running'] += 1
+        return func(*args)
+    
+    def job_done(self, future, folder, file, attempt, input_bytes, duration):
+        """转换任务完成回调，更新统计信息，失败时安排重试"""
+        try:
+            result = future.result()
+        except Exception as e:
+            result = subprocess.CompletedProcess([], -1, '', str(e))
+        with self.lock:
+            self.stats['running'] -= 1
+            if result.returncode == 0:
+                self.stats['processed'] += 1
+                self.stats['processed_bytes'] += input_bytes
+                self.stats['processed_seconds'] += duration
+        if result.returncode == 0:
+            self.mark_handled(folder, [file])
+            self.log(f"转换成功: {file}")
+        else:
+            self.conversion_failed(folder, file, attempt, f"错误输出: {result.stderr}")
+    
+    def conversion_failed(self, folder, file, attempt, error):
+        """转换失败时在RETRY_SECONDS秒后重试，达到MAX_CONVERT_ATTEMPTS次后放弃"""
+        file_path = os.path.join(folder, file)
+        if attempt >= self.MAX_CONVERT_ATTEMPTS:
+            with self.lock:
+                self.stats['failed'] += 1
+                self.in_progress.discard(file_path)
+            self.log(f"转换失败，已尝试 {attempt} 次，放弃: {file}\n{error}")
+            return
+        with self.lock:
+            self.convert_retries[file_path] = (folder, file, attempt + 1, time.time() + self.RETRY_SECONDS)
+        # 可能在工作线程中调用，唤醒空闲等待中的监控循环以便按时重试
+        self.wake_event.set()
+        self.log(f"转换失败（第 {attempt} 次），{self.RETRY_SECONDS} 秒后重试: {file}\n{error}")
+    
+    def retry_conversions(self):
+        """重新提交已到重试时间的转换"""
+        now = time.time()
+        with self.lock:
+            due = [retry for retry in self.convert_retries.values() if retry[3] <= now]
+            for folder, file, _, _ in due:
+                del self.convert_retries[os.path.join(folder, file)]
+        for folder, file, attempt, _ in due:
+            self.start_conversion(folder, file, attempt)
+    
+    def queue_merge(self, folder, file):
+        """将新文件加入对应合并文件的追加队列"""
+        ext = os.path.splitext(file)[1].lower()
+        self.check_merge_order(folder, ext, file)
+        with self.lock:
+            self.in_progress.add(os.path.join(folder, file))
+        self.merge_queues.setdefault((folder, ext), []).append(file)
+        if ext not in self.processor.APPENDABLE_MERGE_FORMATS and (folder, ext) in self.next_merge_at:
+            # 容器格式每次追加都要重写整个合并文件，攒批后按合并间隔重写
+            self.log(f"{ext} 格式追加需要重写合并文件，{file} 将在下次批量合并时追加（间隔 {self.merge_interval:g} 秒）")
+    
+    def check_merge_order(self, folder, ext, file):
+        """新文件序号小于已合并的最后序号时给出警告（补录的分段会被追加到末尾）"""
+        key = (folder, ext)
+        numbers = re.findall(r'\d+', file)
+        if not numbers:
+            return
+        number = int(max(numbers, key=len))
+        last_number = self.last_merged_number.get(key)
+        if last_number is not None and number < last_number:
+            self.log(f"警告: {file} 的序号 {number} 小于已合并的序号 {last_number}，将被追加到合并文件末尾，顺序与录制顺序不一致")
+        else:
+            self.last_merged_number[key] = number
+    
+    def merge_queued_files(self, force=False):
+        """追加各合并文件队列中的文件
+        
+        流格式逐个追加；需要重写的容器格式按合并间隔批量重写（force时立即重写）。
+        某个文件追加失败时，该合并文件暂停追加，之后的文件留在队列中，直到该文件修复或被删除后再继续，
+        避免合并文件中出现缺口。
+        """
+        now = time.time()
+        for key in list(self.merge_queues):
+            folder, ext = key
+            queue = self.merge_queues[key]
+            
+            # 队列中已被删除的文件不再追加
+            for file in [file for file in queue if not os.path.exists(os.path.join(folder, file))]:
+                queue.remove(file)
+                with self.lock:
+                    self.stats['failed'] += 1
+                    self.in_progress.discard(os.path.join(folder, file))
+                self.log(f"文件已被删除，从合并队列中移除: {file}")
+            if not queue:
+                del self.merge_queues[key]
+                self.blocked_merges.discard(key)
+                continue
+            if not force and now < self.next_merge_at.get(key, 0):
+                continue
+            
+            if ext in self.processor.APPENDABLE_MERGE_FORMATS:
+                while queue and self.merge_files(folder, ext, queue[:1]):
+                    queue.pop(0)
+            elif self.merge_files(folder, ext, queue):
+                queue.clear()
+                self.next_merge_at[key] = now + self.merge_interval
+            
+            if queue:
+                self.blocked_merges.add(key)
+                self.next_merge_at[key] = now + self.RETRY_SECONDS
+            else:
+                del self.merge_queues[key]
+                self.blocked_merges.discard(key)
+    
+    def merge_files(self, folder, ext, files):
+        """探测文件并追加到合并文件，返回是否成功；失败时合并文件保持追加前的内容"""
+        output_file = os.path.join(folder, f"merged_watch{ext}")
+        with self.lock:
+            self.stats['running'] += 1
+        try:
+            sizes, durations = [], []
+            for file in files:
+                info = self.processor.probe_audio_file(os.path.join(folder, file))
+                if not info or not any(stream.get('codec_type') == 'audio' for stream in info.get('streams', [])):
+                    raise Exception(f"无法识别的音频文件: {file}")
+                sizes.append(os.path.getsize(os.path.join(folder, file)))
+                durations.append(float(info.get('format', {}).get('duration', 0) or 0))
+            if not self.processor.append_to_merged_file(folder, files, output_file):
+                raise Exception("FFmpeg合并失败")
+        except Exception as e:
+            with self.lock:
+                self.stats['running'] -= 1
+            self.log(f"追加合并出错: {e}\n{output_file} 暂停追加，{self.RETRY_SECONDS} 秒后重试；"
+                     f"修复或删除出错的文件后继续追加")
+            return False
+        
+        with self.lock:
+            self.stats['running'] -= 1
+            self.stats['processed'] += len(files)
+            self.stats['processed_bytes'] += sum(sizes)
+            self.stats['processed_seconds'] += sum(durations)
+        self.mark_handled(folder, files)
+        self.log(f"已追加 {len(files)} 个文件到: {output_file}")
+        return True
+    
+    def get_status(self):
+        """返回当前队列深度和吞吐量"""
+        uptime = time.time() - self.start_time
+        with self.lock:
+            stats = dict(self.stats)
+            retrying = len(self.convert_retries)
+        merge_queues = dict(self.merge_queues)
+        merge_queued = sum(len(queue) for queue in merge_queues.values())
+        retrying += sum(len(queue) for key, queue in merge_queues.items() if key in self.blocked_merges)
+        return {
+            'folders': self.folders,
+            'action': self.action,
+            'watcher': 'events' if self.observer else 'polling',
+            'workers': self.workers,
+            'writing': len(self.pending),
+            'queue_depth': stats['queued'] + stats['running'] + merge_queued,
+            'queued': stats['queued'] + merge_queued,
+            'running': stats['running'],
+            'retrying': retrying,
+            'processed': stats['processed'],
+            'failed': stats['failed'],
+            'processed_bytes': stats['processed_bytes'],
+            'uptime_seconds': round(uptime, 1),
+            'files_per_minute': round(stats['processed'] * 60 / uptime, 2) if uptime else 0,
+            'audio_seconds_per_second': round(stats['processed_seconds'] / uptime, 2) if uptime else 0
+        }
+    
+    def start_status_server(self):
+        """在本机端口上提供JSON格式的状态查询接口"""
+        watcher = self
+        
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(watcher.get_status(), ensure_ascii=False, indent=4).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        try:
+            self.status_server = ThreadingHTTPServer(('127.0.0.1', self.status_port), StatusHandler)
+        except OSError as e:
+            self.log(f"状态接口启动失败（端口 {self.status_port}）: {e}")
+            return
+        threading.Thread(target=self.status_server.serve_forever, daemon=True).start()
+        self.log(f"状态接口: http://127.0.0.1:{self.status_port}/")
+    
+    def start_observer(self):
+        """使用watchdog监听文件事件，事件只用于唤醒扫描循环"""
+        wake_event = self.wake_event
+        
+        class WakeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake_event.set()
+        
+        self.observer = Observer()
+        for folder in self.folders:
+            self.observer.schedule(WakeHandler(), folder, recursive=False)
+        self.observer.start()
+    
+    def log(self, message):
+        self.processor.log(f"[监控] {message}")
+    
+    def run(self):
+        """运行监控循环，直到按 Ctrl+C 停止"""
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                self.log(f"文件夹不存在: {folder}")
+                return
+        if not self.folders:
+            self.log("没有配置要监控的文件夹")
+            return
+        
+        if Observer is not None:
+            self.start_observer()
+        if self.status_port:
+            self.start_status_server()
+        self.log(f"开始监控 {len(self.folders)} 个文件夹（{'文件事件' if self.observer else '轮询'}模式，"
+                 f"处理方式: {'追加合并' if self.action == 'merge' else '格式转换'}，并行进程数: {self.workers}）")
+        
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    ready = self.collect_ready_files()
+                except Exception as e:
+                    self.log(f"扫描文件夹出错: {e}")
+                    ready = {}
+                for folder, new_files in ready.items():
+                    # 单批文件出错不影响后续处理，尚未交给转换或合并的文件下次扫描时重新处理
+                    try:
+                        self.process_folder(folder, new_files)
+                    except Exception as e:
+                        self.log(f"处理 {folder} 的新文件出错: {e}")
+                        self.release_files(folder, new_files)
+                self.retry_conversions()
+                self.merge_queued_files()
+                
+                # 有正在写入、待合并或待重试的文件时按轮询间隔检查，期间忽略文件事件（录音写入会持续触发修改事件）；
+                # 使用文件事件且空闲时等待事件唤醒
+                if self.pending or self.merge_queues or self.convert_retries or self.observer is None:
+                    self.stop_event.wait(self.poll_interval)
+                else:
+                    self.wake_event.wait(self.IDLE_RESCAN_SECONDS)
+                self.wake_event.clear()
+        except KeyboardInterrupt:
+            self.log("收到停止信号，等待正在执行的任务完成...")
+        finally:
+            self.merge_queued_files(force=True)
+            if self.observer:
+                self.observer.stop()
+                self.observer.join()
+            if self.status_server:
+                self.status_server.shutdown()
+            self.executor.shutdown(wait=True)
+            self.log("监控已停止")
+
 # 主程序入口
 if __name__ == '__main__':
+    # 监控模式: python audio_processor.py --watch [文件夹 ...]
+    if len(sys.argv) > 1 and sys.argv[1] == '--watch':
+        app = AudioProcessor(headless=True)
+        if not app.ffmpeg_available:
+            sys.exit(1)
+        folders = sys.argv[2:] or app.watch_config.get('folders') or [app.last_folder]
+        FolderWatcher(app, folders, app.watch_config).run()
+        sys.exit(0)
+    
     try:
         app = AudioProcessor()
         app.run()
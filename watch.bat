@@ -0,0 +1,4 @@
+@echo off
+cd /d %~dp0
+python audio_processor.py --watch
+pause
\ No newline at end of file